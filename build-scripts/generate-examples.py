@@ -1,13 +1,20 @@
+import argparse
+import hashlib
+import io
+import json
 import os
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from gopro_overlay import arguments
+from gopro_overlay import arguments, geo_render
+from gopro_overlay.__version__ import __version__
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.ffmpeg_gopro import DataStream
 from gopro_overlay.font import load_font
 from gopro_overlay.framemeta_gpmd import framemeta_from_datafile
-from gopro_overlay.geo import MapRenderer, MapStyler
+from gopro_overlay.geo import MapRenderer, MapStyler, attrs_for_style, available_map_styles
 from gopro_overlay.layout import Overlay
 from gopro_overlay.layout_xml import layout_from_xml
 from gopro_overlay.privacy import NoPrivacyZone
@@ -16,103 +23,231 @@ from gopro_overlay.widgets.widgets import SimpleFrameSupplier
 
 mydir = os.path.dirname(__file__)
 
-
-def tryint(s):
-    try:
-        return int(s)
-    except:
-        return s
+_TEMPLATE_RE = re.compile(r"{{(.+?)}}", re.MULTILINE | re.DOTALL)
+_NUM_RE = re.compile(r"([0-9]+)")
+_DIMENSION_RE = re.compile(r"Dimension\((\d+),(\d+)\)")
 
 
 def alphanum_key(s):
-    return [tryint(c) for c in re.split(r'([0-9]+)', s)]
+    return [int(c) if c.isdigit() else c for c in _NUM_RE.split(s)]
 
 
 AUTO_HEADER = "<!-- \n\nAuto Generated File DO NOT EDIT \n\n-->\n"
 
-if __name__ == "__main__":
-    dest = os.path.join(os.path.dirname(mydir), "docs/xml/examples")
-    example_dir = os.path.join(mydir, "examples")
-    examples = sorted(
-        list(filter(lambda it: it.endswith(".md"), os.listdir(example_dir))),
-        key=alphanum_key
-    )
+template = """<layout>
+    {example}
+    </layout>"""
 
-    examples = [os.path.join(example_dir, it) for it in examples]
+privacy = NoPrivacyZone()
+
+font_name = "Roboto-Medium.ttf"
+datapath = os.path.join(mydir, "..", "tests/meta/gopro-meta.gpmd")
 
-    renderer = MapRenderer(cache_dir=arguments.default_config_location, styler=MapStyler())
+# kept outside docs/, so the committed examples don't fill up with hash files
+hash_dir = arguments.default_config_location / "example-hashes"
 
-    datapath = os.path.join(mydir, "..", "tests/meta/gopro-meta.gpmd")
-    timeseries = framemeta_from_datafile(
+
+def load_timeseries():
+    return framemeta_from_datafile(
         datapath=datapath,
         units=units,
         datastream=DataStream(stream=3, frame_count=707, timebase=1000, frame_duration=1001)
     )
 
-    font = load_font("Roboto-Medium.ttf")
 
-    template = """<layout>
-    {example}
-    </layout>"""
+# WEBP encodes much faster than PNG's single-threaded deflate
+image_formats = {
+    "png": {"format": "PNG"},
+    "webp": {"format": "WEBP", "quality": 90, "method": 0},
+}
 
-    with renderer.open() as map_renderer:
-        for filepath in examples:
-            print(filepath)
-            with open(filepath) as f:
-                example_markdown = f.read()
 
-            count = 0
+def inputs_digest():
+    # everything an example is drawn with, other than its own xml - the rendering code, the font, the map styles and
+    # the data - so changing any of them re-renders the lot
+    digest = hashlib.blake2b(digest_size=16)
 
-            basename = Path(os.path.basename(filepath))
+    package = Path(mydir).parent / "gopro_overlay"
+    for source in sorted(package.rglob("*.py")):
+        digest.update(str(source.relative_to(package)).encode())
+        digest.update(source.read_bytes())
 
-            example_dest = os.path.join(dest, basename.stem)
+    for path in [load_font(font_name).path, datapath]:
+        with open(path, "rb") as f:
+            digest.update(f.read())
 
-            dimensions_match = re.search(r"Dimension\((\d+),(\d+)\)", example_markdown)
-            if dimensions_match is None:
-                dimensions = Dimension(200, 100)
-            else:
-                dimensions = Dimension(int(dimensions_match.group(1)), int(dimensions_match.group(2)))
+    styles = {style: attrs_for_style(style) for style in available_map_styles()}
+    digest.update(json.dumps(styles, sort_keys=True, default=str).encode())
 
-            while True:
-                match = re.search(r"{{(.+?)}}", example_markdown, re.MULTILINE | re.DOTALL)
-                if match is None:
-                    break
+    return digest.hexdigest()
 
-                imagename = basename.with_name(basename.stem + f"-{count}" + basename.suffix).with_suffix(f".png")
-                count += 1
 
-                group = match.group(1)
-                xml = group.strip()
-                example_markdown = example_markdown[0:match.start(0)] + \
-                                   f"""
-```xml
-{xml}
-```
-<kbd>![{imagename}]({imagename})</kbd>
-""" + \
-                                   example_markdown[match.end(0):]
+def render_key(inputs, xml, dimensions, image_format):
+    key = hashlib.blake2b(digest_size=16)
+    for part in [__version__, inputs, template, xml, f"{dimensions.x}x{dimensions.y}", image_format]:
+        key.update(part.encode())
+    return key.hexdigest()
+
+
+def bytes_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def up_to_date(output_path, hash_path, key):
+    # the hash file lives away from the image, so also check the image is still the one that was rendered - it may
+    # since have been checked out again, or this may be a different clone
+    if os.path.exists(output_path) and os.path.exists(hash_path):
+        with open(hash_path) as f:
+            recorded = f.read().split()
+        with open(output_path, "rb") as f:
+            return recorded == [key, bytes_digest(f.read())]
+    return False
+
+
+# there's no way to read the umask without setting it
+umask = os.umask(0)
+os.umask(umask)
+
+
+def write_atomically(path, write):
+    # write alongside the destination and rename into place, so a failed run can't leave a partial file behind
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".", delete=False) as f:
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    # NamedTemporaryFile is only readable by its owner - give it the permissions a plain open() would have
+    os.chmod(f.name, 0o666 & ~umask)
+    os.replace(f.name, path)
+
+
+# Per-process state - each worker builds its own, as fonts, timeseries and renderers don't pickle
+worker = {}
+
+
+def init_worker(inputs):
+    worker["inputs"] = inputs
+
+
+def create_renderer():
+    # one download at a time per process - with a process per cpu, the provider's limit would be exceeded otherwise
+    return MapRenderer(cache_dir=arguments.default_config_location, styler=MapStyler(), num_workers=1)
+
+
+def worker_state(name, create):
+    # only built the first time a block actually needs drawing - loading the timeseries takes a while, and a rerun
+    # with nothing changed shouldn't have to pay for it
+    if name not in worker:
+        worker[name] = create()
+    return worker[name]
 
+
+def render_example(filepath, dest, force=False, image_format="png"):
+    print(filepath)
+
+    with open(filepath) as f:
+        example_markdown = f.read()
+
+    count = 0
+
+    basename = Path(os.path.basename(filepath))
+
+    example_dest = os.path.join(dest, basename.stem)
+
+    dimensions_match = _DIMENSION_RE.search(example_markdown)
+    if dimensions_match is None:
+        dimensions = Dimension(200, 100)
+    else:
+        dimensions = Dimension(int(dimensions_match.group(1)), int(dimensions_match.group(2)))
+
+    supplier = SimpleFrameSupplier(dimensions, background=(0, 0, 0, 255))
+
+    def replacer(match):
+        nonlocal count
+
+        imagename = basename.with_name(basename.stem + f"-{count}" + basename.suffix).with_suffix(f".{image_format}")
+        count += 1
+
+        xml = match.group(1).strip()
+
+        output_path = os.path.join(example_dest, imagename)
+        hash_path = os.path.join(hash_dir, basename.stem, f"{imagename}.hash")
+        key = render_key(worker["inputs"], xml, dimensions, image_format)
+
+        if force or not up_to_date(output_path, hash_path, key):
+            timeseries = worker_state("timeseries", load_timeseries)
+            failures = geo_render.cache.failures
+
+            # each worker has its own renderer - a tile is only reused by other workers once it has been written to the
+            # on-disk cache, so concurrent cold misses in different workers may still download the same tile
+            with worker_state("renderer", create_renderer).open() as map_renderer:
                 layout = layout_from_xml(
                     template.format(example=xml),
                     map_renderer,
                     timeseries,
-                    font,
-                    privacy=NoPrivacyZone()
+                    worker_state("font", lambda: load_font(font_name)),
+                    privacy=privacy
                 )
 
                 overlay = Overlay(framemeta=timeseries, create_widgets=layout)
-                supplier = SimpleFrameSupplier(dimensions, background=(0,0,0,255))
                 image = overlay.draw(timeseries.mid, supplier.drawing_frame())
 
-                os.makedirs(example_dest, exist_ok=True)
+            buffer = io.BytesIO()
+            image.save(fp=buffer, **image_formats[image_format])
+            data = buffer.getvalue()
+
+            write_atomically(output_path, lambda f: f.write(data))
+            if geo_render.cache.failures == failures:
+                write_atomically(hash_path, lambda f: f.write(f"{key}\n{bytes_digest(data)}\n".encode()))
+            else:
+                # drawn with placeholder map tiles, so leave it to be drawn again next time
+                print(f"{output_path}: some map tiles could not be loaded, will render again next time")
+                if os.path.exists(hash_path):
+                    os.unlink(hash_path)
+
+        return f"""
+```xml
+{xml}
+```
+<kbd>![{imagename}]({imagename})</kbd>
+"""
+
+    example_markdown = _TEMPLATE_RE.sub(replacer, example_markdown)
+
+    example_markdown = AUTO_HEADER + example_markdown
+
+    write_atomically(os.path.join(example_dest, "README.md"), lambda f: f.write(example_markdown.encode()))
+
+    return filepath
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the layout documentation examples")
+    parser.add_argument("--force", action="store_true", help="Render all examples, even if unchanged")
+    parser.add_argument("--format", choices=list(image_formats.keys()), default="png",
+                        help="Image format for rendered examples")
+    args = parser.parse_args()
+
+    dest = os.path.join(os.path.dirname(mydir), "docs/xml/examples")
+    example_dir = os.path.join(mydir, "examples")
+    examples = sorted(
+        list(filter(lambda it: it.endswith(".md"), os.listdir(example_dir))),
+        key=alphanum_key
+    )
 
-                output_path = os.path.join(example_dest, imagename)
-                image.save(fp=output_path)
+    examples = [os.path.join(example_dir, it) for it in examples]
 
-            example_markdown = AUTO_HEADER + example_markdown
+    inputs = inputs_digest()
 
-            with open(os.path.join(example_dest, "README.md"), "w") as f:
-                f.write(example_markdown)
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=init_worker, initargs=(inputs,)) as executor:
+        futures = [executor.submit(render_example, filepath, dest, args.force, args.format) for filepath in examples]
+        # wait in submission order, so any failure is reported
+        for future in futures:
+            future.result()
 
 
     def link(filename):
@@ -124,10 +259,11 @@ if __name__ == "__main__":
         [link(os.path.basename(filepath)) for filepath in examples]
     )
 
-    with open(os.path.join(dest, "README.md"), "w") as f:
-        f.write(f"""
+    readme = f"""
 {AUTO_HEADER}
 # Layout Configuration Documentation
 
 {links}
-        """)
+        """
+
+    write_atomically(os.path.join(dest, "README.md"), lambda f: f.write(readme.encode()))
@@ -67,6 +67,11 @@ def fake_framemeta(length: datetime.timedelta = datetime.timedelta(seconds=20),
     accl = Random1D(5, -10, rng=rng)
     grav = Random1D(0, -1, rng=rng)
 
+    # pint unit lookup/parsing is far slower than generating the values, so only do it once
+    number, mps, rpm, bpm, metres, celsius = units.number, units.mps, units.rpm, units.bpm, units.m, units.celsius
+    mps2 = units.Unit("m/s**2")
+    frame_step = timeunits(seconds=step.total_seconds())
+
     fm = FrameMeta()
     current_dt = datetime.datetime.fromtimestamp(start_timestamp, tz=datetime.timezone.utc)
     current_frame_time = timeunits(millis=0)
@@ -80,24 +85,24 @@ def fake_framemeta(length: datetime.timedelta = datetime.timedelta(seconds=20),
             current_frame_time,
             Entry(
                 current_dt,
-                timestamp=units.Quantity(current_frame_time.millis(), units.number),
+                timestamp=units.Quantity(current_frame_time.millis(), number),
                 point=points.step(),
 
-                dop=units.Quantity(20, units.number),
-                packet=units.Quantity(counter // 18, units.number),
-                packet_index=units.Quantity(counter % 18, units.number),
+                dop=units.Quantity(20, number),
+                packet=units.Quantity(counter // 18, number),
+                packet_index=units.Quantity(counter % 18, number),
 
-                speed=units.Quantity(speed.step(), units.mps),
+                speed=units.Quantity(speed.step(), mps),
                 accel=units.Quantity(accel.step()),
-                cad=units.Quantity(cad.step(), units.rpm),
-                hr=units.Quantity(hr.step(), units.bpm),
-                alt=units.Quantity(alt.step(), units.m),
-                atemp=units.Quantity(temp.step(), units.celsius),
+                cad=units.Quantity(cad.step(), rpm),
+                hr=units.Quantity(hr.step(), bpm),
+                alt=units.Quantity(alt.step(), metres),
+                atemp=units.Quantity(temp.step(), celsius),
                 grad=units.Quantity(grad.step()),
                 accl=PintPoint3(
-                    x=units.Quantity(accl.step(), "m/s**2"),
-                    y=units.Quantity(accl.step(), "m/s**2"),
-                    z=units.Quantity(accl.step(), "m/s**2"),
+                    x=units.Quantity(accl.step(), mps2),
+                    y=units.Quantity(accl.step(), mps2),
+                    z=units.Quantity(accl.step(), mps2),
                 ),
                 grav=PintPoint3(
                     x=units.Quantity(grav.step()),
@@ -109,7 +114,7 @@ def fake_framemeta(length: datetime.timedelta = datetime.timedelta(seconds=20),
             )
         )
         current_dt = current_dt + step
-        current_frame_time = current_frame_time + timeunits(seconds=step.total_seconds())
+        current_frame_time = current_frame_time + frame_step
 
         counter += 1
 
@@ -102,6 +102,8 @@ max_distance = timeunits(seconds=6)
 class FrameMeta:
     def __init__(self, packets_per_second=18):
         self.modified = False
+        # bumped by changes made through FrameMeta itself - code that updates an Entry directly must bump it too
+        self.generation = 0
         self.pps = packets_per_second
         self.framelist: List[Timeunit] = []
         self.frames: MutableMapping[Timeunit, Entry] = {}
@@ -123,10 +125,12 @@ class FrameMeta:
     def add(self, at_time: Timeunit, entry):
         self.frames[at_time] = entry
         self.modified = True
+        self.generation += 1
 
     def clone(self) -> 'FrameMeta':
         fm = FrameMeta()
-        [fm.add(t, e) for t, e in self.frames.items()]
+        # copies of the entries - changes to the clone mustn't reach this framemeta, which wouldn't know it had changed
+        [fm.add(t, Entry(e.dt, **e.items)) for t, e in self.frames.items()]
         return fm
 
     def date_at(self, t: Timeunit) -> datetime.datetime:
@@ -210,6 +214,7 @@ class FrameMeta:
                 updates = processor(entry_a, entry_b, skip)
                 if updates:
                     entry_a.update(**updates)
+                    self.generation += 1
 
     def process_accel(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
         self.check_modified()
@@ -222,6 +227,7 @@ class FrameMeta:
                 updates = processor(entry_a, entry_b, skip)
                 if updates:
                     entry_b.update(**updates)
+                    self.generation += 1
 
     def process_from_start(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True):
         self.check_modified()
@@ -233,6 +239,7 @@ class FrameMeta:
                 updates = processor(entry, entry_start)
                 if updates:
                     entry.update(**updates)
+                    self.generation += 1
     
     def process(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True):
         self.check_modified()
@@ -242,6 +249,7 @@ class FrameMeta:
                 updates = processor(entry)
                 if updates:
                     entry.update(**updates)
+                    self.generation += 1
 
     def duration(self):
         self.check_modified()
@@ -111,6 +111,7 @@ def merge_frame_meta(gps: FrameMeta, other: FrameMeta, update: Callable[[FrameMe
             frame_time = item.timestamp
             closest_previous = other.get(timeunits(millis=frame_time.magnitude))
             item.update(**update(closest_previous))
+        gps.generation += 1
 
 
 class LoadFlag(Enum):
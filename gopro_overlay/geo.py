@@ -192,19 +192,19 @@ def sqlite_downloader(db: SqliteDict):
     return partial(caching_downloader, get_key, set_key, fetch_tiles)
 
 
-def sqlite_caching_renderer(provider: MapProvider, db: SqliteDict):
+def sqlite_caching_renderer(provider: MapProvider, db: SqliteDict, num_workers=None):
     def render(map, tiles=None, **kwargs):
         map.provider = provider
-        return my_render_map(map, tiles, downloader=sqlite_downloader(db), **kwargs)
+        return my_render_map(map, tiles, downloader=sqlite_downloader(db), num_workers=num_workers, **kwargs)
 
     return render
 
 
-def memory_caching_renderer(provider: MapProvider):
+def memory_caching_renderer(provider: MapProvider, num_workers=None):
     def render(map, tiles=None, **kwargs):
         map.provider = provider
 
-        return my_render_map(map, tiles, downloader=fetch_tiles)
+        return my_render_map(map, tiles, downloader=fetch_tiles, num_workers=num_workers)
 
     return render
 
@@ -295,9 +295,10 @@ class MapStyler:
 
 class MapRenderer:
 
-    def __init__(self, cache_dir: pathlib.Path, styler: MapStyler):
+    def __init__(self, cache_dir: pathlib.Path, styler: MapStyler, num_workers: Optional[int] = None):
         self.cache_dir = cache_dir
         self.styler = styler
+        self.num_workers = num_workers
 
     @contextlib.contextmanager
     def open(self, style: str = "osm"):
@@ -311,6 +312,6 @@ class MapRenderer:
                     filename=str(self.cache_dir.joinpath("tilecache.sqlite")),
                     autocommit=True
             ) as db:
-                yield sqlite_caching_renderer(map, db)
+                yield sqlite_caching_renderer(map, db, self.num_workers)
         else:
-            yield memory_caching_renderer(map)
+            yield memory_caching_renderer(map, self.num_workers)
@@ -1,6 +1,8 @@
 import asyncio
 import io
 import itertools
+import threading
+from collections import OrderedDict
 from typing import List
 
 import PIL
@@ -15,19 +17,44 @@ from gopro_overlay.log import log
 # Use downloader as per geotiler
 
 class ImageTileCache:
+    """LRU of decoded tile images, keyed by url"""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        # urls currently held as the error image, and how many times one has been handed out
+        self.failed = set()
+        self.failures = 0
+
+    def get(self, url):
+        with self.lock:
+            img = self.cache.get(url)
+            if img is not None:
+                self.cache.move_to_end(url)
+            return img
+
+    def put(self, url, img, failed=False):
+        with self.lock:
+            self.cache[url] = img
+            self.cache.move_to_end(url)
+            if failed:
+                self.failed.add(url)
+            else:
+                self.failed.discard(url)
+            while len(self.cache) > self.maxsize:
+                evicted, _ = self.cache.popitem(last=False)
+                self.failed.discard(evicted)
 
-    def __init__(self):
-        self.cache = {}
-
-    async def do_async_download(self, downloader, tiles: List[Tile]):
-        gen = downloader(tiles, 1)
+    async def do_async_download(self, downloader, tiles: List[Tile], num_workers: int):
+        gen = downloader(tiles, num_workers)
         l = []
         async for g in gen:
             l.append(g)
         return l
 
-    def do_download(self, downloader, tiles: List[Tile]) -> List[Tile]:
-        task = self.do_async_download(downloader, tiles)
+    def do_download(self, downloader, tiles: List[Tile], num_workers: int = 1) -> List[Tile]:
+        task = self.do_async_download(downloader, tiles, num_workers)
         loop = asyncio.get_event_loop()
         return loop.run_until_complete(task)
 
@@ -35,12 +62,13 @@ class ImageTileCache:
         f = io.BytesIO(data)
         return PIL.Image.open(f).convert('RGBA')
 
-    def populate(self, downloader, tiles: List[Tile], error_image):
+    def populate(self, downloader, tiles: List[Tile], error_image, num_workers: int = 1):
 
         # Populate image directly for those we know already
         def c(t):
-            if t.url in self.cache:
-                return t._replace(img=self.cache[t.url])
+            img = self.get(t.url)
+            if img is not None:
+                return t._replace(img=img)
             return t
 
         tiles = [c(t) for t in tiles]
@@ -48,8 +76,12 @@ class ImageTileCache:
         have = [t for t in tiles if t.img is not None]
         have_not = [t for t in tiles if t.img is None]
 
-        # Now use existing download to download
-        downloaded = self.do_download(downloader, have_not)
+        if not have_not:
+            self.count_failures(have)
+            return have
+
+        # Now use existing download to download, concurrently as far as the provider allows
+        downloaded = self.do_download(downloader, have_not, num_workers)
 
         converted = []
 
@@ -64,16 +96,22 @@ class ImageTileCache:
                     log(f"Unable to load image data from {d.url} - {e}")
                     img = error_image
 
-            self.cache[d.url] = img
+            self.put(d.url, img, failed=img is error_image)
             converted.append(d._replace(img=img))
 
-        return list(itertools.chain(have, converted))
+        tiles = list(itertools.chain(have, converted))
+        self.count_failures(tiles)
+        return tiles
+
+    def count_failures(self, tiles: List[Tile]):
+        with self.lock:
+            self.failures += sum(1 for t in tiles if t.url in self.failed)
 
 
 cache = ImageTileCache()
 
 
-def my_render_map(map, tiles, downloader, **kwargs):
+def my_render_map(map, tiles, downloader, num_workers=None, **kwargs):
     tile_url = map.provider.tile_url
 
     coord, offset = _find_top_left_tile(map)
@@ -84,7 +122,13 @@ def my_render_map(map, tiles, downloader, **kwargs):
 
     provider = map.provider
 
-    tiles = cache.populate(downloader, tiles, _error_image(provider.tile_width, provider.tile_height))
+    tiles = cache.populate(
+        downloader,
+        tiles,
+        _error_image(provider.tile_width, provider.tile_height),
+        # the provider's limit is per renderer - callers running several renderers at once should share it out
+        num_workers=num_workers or provider.limit
+    )
 
     image = PIL.Image.new('RGBA', tuple(map.size))
 
@@ -1,4 +1,5 @@
 import math
+import weakref
 from typing import List
 
 from .gpmf import GPS_FIXED_VALUES
@@ -81,3 +82,18 @@ class Journey:
             return BoundingBox(Point(lat.min, lon.min), Point(lat.min + MIN_BOX_SIZE, lon.min + MIN_BOX_SIZE))
 
         return BoundingBox(Point(lat.min, lon.min), Point(lat.max, lon.max))
+
+
+_journeys = weakref.WeakKeyDictionary()
+
+
+def journey_of(framemeta) -> Journey:
+    """Shared between all widgets using the same framemeta, until the framemeta is changed"""
+    cached = _journeys.get(framemeta)
+    if cached is not None and cached[0] == framemeta.generation:
+        return cached[1]
+
+    journey = Journey()
+    framemeta.process(journey.accept)
+    _journeys[framemeta] = (framemeta.generation, journey)
+    return journey
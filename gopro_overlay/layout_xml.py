@@ -505,8 +505,13 @@ class Widgets:
             rotate=battrib(element, "rotate", d=True)
         )
 
-    @allow_attributes({"x", "y", "size", "corner_radius", "opacity"})
+    @allow_attributes({"x", "y", "size", "corner_radius", "opacity", "max_points"})
     def create_journey_map(self, element: ET.Element, entry, **kwargs) -> Widget:
+        # no upper limit - more points than the journey has just means no points are dropped
+        max_points = iattrib(element, "max_points", d=None)
+        if max_points is not None and max_points < 2:
+            raise ValueError(f"Value for 'max_points' in '{element.tag}' needs to be at least 2, not '{max_points}'")
+
         return journey_map(
             at(element),
             entry,
@@ -515,7 +520,8 @@ class Widgets:
             timeseries=self.framemeta,
             size=iattrib(element, "size", d=256),
             corner_radius=iattrib(element, "corner_radius", 0),
-            opacity=fattrib(element, "opacity", 0.7, r=FloatRange(0.0, 1.0))
+            opacity=fattrib(element, "opacity", 0.7, r=FloatRange(0.0, 1.0)),
+            max_points=max_points
         )
 
     @allow_attributes({"size", "zoom"})
@@ -16,6 +16,15 @@ class PrivacyZone:
         )
         return actual <= self.dist
 
+    def exclude(self, points):
+        limit = self.dist.to(units.m).magnitude
+        inverse = Geodesic.WGS84.Inverse
+        lat, lon = self.point.lat, self.point.lon
+        return [
+            p for p in points
+            if abs(inverse(lat, lon, p.lat, p.lon, Geodesic.DISTANCE)['s12']) > limit
+        ]
+
     def __str__(self):
         return f"PrivacyZone: {self.dist} around {self.point}"
 
@@ -23,3 +32,6 @@ class PrivacyZone:
 class NoPrivacyZone:
     def encloses(self, point):
         return False
+
+    def exclude(self, points):
+        return points
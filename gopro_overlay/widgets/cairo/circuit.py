@@ -5,7 +5,7 @@ from typing import Callable, Tuple
 import cairo
 
 from gopro_overlay.framemeta import FrameMeta
-from gopro_overlay.journey import Journey
+from gopro_overlay.journey import Journey, journey_of
 from gopro_overlay.point import Point, Coordinate
 from gopro_overlay.rdp import rdp
 from gopro_overlay.widgets.cairo.cairo import set_source, saved, CairoWidget, CairoCache, CairoComposite
@@ -120,8 +120,7 @@ class CairoCircuit(CairoWidget):
 
     def journey(self):
         if self._journey is None:
-            self._journey = Journey()
-            self.framemeta.process(self._journey.accept)
+            self._journey = journey_of(self.framemeta)
             bbox = self._journey.bounding_box
             size = bbox.size() * 1.1
 
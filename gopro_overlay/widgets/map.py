@@ -1,12 +1,13 @@
 import math
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, List, Tuple
 
 import geotiler
 from PIL import ImageDraw, Image
 
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.framemeta import FrameMeta
-from gopro_overlay.journey import Journey
+from gopro_overlay.journey import journey_of
 from gopro_overlay.log import log
 from gopro_overlay.point import Point
 from gopro_overlay.privacy import NoPrivacyZone
@@ -16,20 +17,33 @@ from gopro_overlay.widgets.widgets import Widget
 
 class PerceptibleMovementCheck:
 
-    def __init__(self, always=False):
+    def __init__(self, zoom, size, always=False):
+        self.zoom = zoom
+        self.size = size
         self.always = always
         self.last_location = None
+        self.resolution = None
 
-    def moved(self, map, location):
+    def _resolution(self, location):
+        # zoom and size are fixed, so only need to work out how far one pixel is once
+        if self.resolution is None:
+            map = geotiler.Map(center=(location.lon, location.lat), zoom=self.zoom, size=self.size)
+
+            location_of_centre_pixel = map.geocode((map.size[0] / 2, map.size[1] / 2))
+            location_of_one_pixel_away = map.geocode(((map.size[0] / 2) + 1, (map.size[1] / 2) + 1))
+
+            self.resolution = (
+                abs(location_of_one_pixel_away[0] - location_of_centre_pixel[0]),
+                abs(location_of_one_pixel_away[1] - location_of_centre_pixel[1])
+            )
+        return self.resolution
+
+    def moved(self, location):
 
         if self.always:
             return True
 
-        location_of_centre_pixel = map.geocode((map.size[0] / 2, map.size[1] / 2))
-        location_of_one_pixel_away = map.geocode(((map.size[0] / 2) + 1, (map.size[1] / 2) + 1))
-
-        x_resolution = abs(location_of_one_pixel_away[0] - location_of_centre_pixel[0])
-        y_resolution = abs(location_of_one_pixel_away[1] - location_of_centre_pixel[1])
+        x_resolution, y_resolution = self._resolution(location)
 
         if self.last_location is not None:
             x_diff = abs(self.last_location.lon - location.lon)
@@ -42,23 +56,27 @@ class PerceptibleMovementCheck:
         return True
 
 
+@lru_cache(maxsize=16)
+def rounded_mask(size, corner_radius, opacity_byte):
+    # putalpha only reads the mask, so the same one can be shared between widgets/frames
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0) + (size - 1, size - 1), radius=corner_radius, fill=opacity_byte)
+    return mask
+
+
 class MaybeRoundedBorder:
 
     def __init__(self, size, corner_radius, opacity):
         self.opacity = opacity
         self.corner_radius = corner_radius
         self.size = size
-        self.mask = None
 
     def rounded(self, image):
 
         draw = ImageDraw.Draw(image)
 
         if self.corner_radius:
-            if self.mask is None:
-                self.mask = self.generate_mask()
-
-            image.putalpha(self.mask)
+            image.putalpha(rounded_mask(self.size, self.corner_radius, int(self.opacity * 255)))
 
             draw.rounded_rectangle(
                 (0, 0) + (self.size - 1, self.size - 1),
@@ -66,25 +84,59 @@ class MaybeRoundedBorder:
                 outline=(0, 0, 0)
             )
         else:
-            draw.line(
-                (0, 0, 0, self.size - 1, self.size - 1, self.size - 1, self.size - 1, 0, 0, 0),
-                fill=(0, 0, 0)
-            )
+            draw.rectangle((0, 0, self.size - 1, self.size - 1), outline=(0, 0, 0))
             image.putalpha(int(255 * self.opacity))
 
         return image
 
-    def generate_mask(self):
-        mask = Image.new('L', (self.size, self.size), 0)
-        ImageDraw.Draw(mask).rounded_rectangle((0, 0) + (self.size - 1, self.size - 1), radius=self.corner_radius,
-                                               fill=int(self.opacity * 255))
-        return mask
+
+def decimate(points, max_points):
+    if max_points is None:
+        return points
+    if max_points < 2:
+        raise ValueError(f"max_points needs to be at least 2, to keep the start and end of the journey, not {max_points}")
+    if len(points) <= max_points:
+        return points
+
+    # always keep the first and last points, so the journey isn't cut short
+    step = math.ceil((len(points) - 1) / (max_points - 1))
+    decimated = points[::step]
+    if decimated[-1] is not points[-1]:
+        decimated.append(points[-1])
+    return decimated
+
+
+def rev_geocode_all(map: geotiler.Map, locations) -> List[Tuple[float, float]]:
+    # same as map.rev_geocode for each location, but only looks up the map and projection details once
+    projection = map.provider.projection
+    project, t = projection.project, projection.transformation
+    scale = math.pow(2, map.zoom - projection.zoom)
+    ox, oy = map.offset
+    origin_x, origin_y = map.origin
+    tile_width, tile_height = map.provider.tile_width, map.provider.tile_height
+    half_w, half_h = map.size[0] / 2, map.size[1] / 2
+
+    radians = math.radians
+
+    plots = []
+    for location in locations:
+        x, y = project((radians(location.lon), radians(location.lat)))
+
+        col = (t.ax * x + t.bx * y + t.cx) * scale
+        row = (t.ay * x + t.by * y + t.cy) * scale
+
+        plots.append((
+            ox + tile_width * (col - origin_x) + half_w,
+            oy + tile_height * (row - origin_y) + half_h
+        ))
+    return plots
 
 
 class JourneyMap(Widget):
     def __init__(self, timeseries, at, location, renderer, size=256, corner_radius=None, opacity=0.7,
-                 privacy_zone=NoPrivacyZone()):
+                 privacy_zone=NoPrivacyZone(), max_points=None):
         self.timeseries = timeseries
+        self.max_points = max_points
         self.privacy_zone = privacy_zone
         self.at = at
         self.location = location
@@ -96,9 +148,7 @@ class JourneyMap(Widget):
 
     def _init_maybe(self):
         if self.map is None:
-            journey = Journey()
-
-            self.timeseries.process(journey.accept)
+            journey = journey_of(self.timeseries)
 
             bbox = journey.bounding_box
             self.map = geotiler.Map(extent=(bbox.min.lon, bbox.min.lat, bbox.max.lon, bbox.max.lat),
@@ -108,10 +158,10 @@ class JourneyMap(Widget):
                 self.map.zoom = 18
 
             plots = rdp(
-                points=[
-                    self.map.rev_geocode((location.lon, location.lat))
-                    for location in journey.locations if not self.privacy_zone.encloses(location)
-                ],
+                points=rev_geocode_all(
+                    self.map,
+                    self.privacy_zone.exclude(decimate(journey.locations, self.max_points))
+                ),
                 epsilon=1
             )
 
@@ -127,13 +177,19 @@ class JourneyMap(Widget):
 
         location = self.location()
 
-        frame = self.image.copy()
+        image.alpha_composite(self.image, self.at.tuple())
 
-        draw = ImageDraw.Draw(frame)
         current = self.map.rev_geocode((location.lon, location.lat))
-        draw_marker(draw, current, 6)
 
-        image.alpha_composite(frame, self.at.tuple())
+        # draw the marker into a small layer covering just the marker, clipped to the map, rather than copying
+        # the whole map. Drawing at the same (fractional) coordinates as the map gives identical pixels
+        left, top = max(0, math.floor(current[0]) - 7), max(0, math.floor(current[1]) - 7)
+        right, bottom = min(self.size, math.floor(current[0]) + 8), min(self.size, math.floor(current[1]) + 8)
+
+        if right > left and bottom > top:
+            marker = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+            draw_marker(ImageDraw.Draw(marker), (current[0] - left, current[1] - top), 6)
+            image.alpha_composite(marker, (self.at.x + left, self.at.y + top))
 
 
 def draw_marker(draw, position, size, fill=None):
@@ -157,14 +213,17 @@ class MovingMap(Widget):
 
         self.half_width_height = (self.hypotenuse / 2)
 
-        self.bounds = (
-            self.half_width_height - (self.size / 2),
-            self.half_width_height - (self.size / 2),
-            self.half_width_height + (self.size / 2),
-            self.half_width_height + (self.size / 2)
+        # whole pixels and exactly size wide - cropping at a .5 edge (odd sizes) would otherwise round each side
+        # differently, and give a different size image depending on how the map was rotated
+        offset = round(self.half_width_height - (self.size / 2))
+        self.bounds = (offset, offset, offset + self.size, offset + self.size)
+        self.perceptible = PerceptibleMovementCheck(
+            zoom=zoom,
+            size=(self.hypotenuse, self.hypotenuse),
+            always=always_redraw
         )
-        self.perceptible = PerceptibleMovementCheck(always_redraw)
         self.border = MaybeRoundedBorder(size=size, corner_radius=corner_radius, opacity=opacity)
+        self.map = None
         self.cached = None
 
     def _redraw(self, map):
@@ -176,21 +235,56 @@ class MovingMap(Widget):
         if azimuth and self.rotate:
             azi = azimuth.to("degree").magnitude
             angle = 0 + azi if azi >= 0 else 360 + azi
-            image = image.rotate(angle, resample=Image.BILINEAR)
+            if angle % 90 != 0:
+                return self.border.rounded(self._rotate_and_crop(image, angle))
+            if angle % 360 != 0:
+                return self.border.rounded(self._transpose_and_crop(image, angle))
 
         crop = image.crop(self.bounds)
 
         return self.border.rounded(crop)
 
+    def _transpose_and_crop(self, image, angle):
+        # same as image.rotate(angle).crop(self.bounds) for multiples of 90, which are exact, so crop
+        # the area that will be rotated into view first, and only transpose that.
+        w = self.hypotenuse
+        left, top, right, bottom = self.bounds
+
+        method, box = {
+            90: (Image.Transpose.ROTATE_90, (w - bottom, left, w - top, right)),
+            180: (Image.Transpose.ROTATE_180, (w - right, w - bottom, w - left, w - top)),
+            270: (Image.Transpose.ROTATE_270, (top, w - right, bottom, w - left)),
+        }[int(angle) % 360]
+
+        return image.crop(box).transpose(method)
+
+    def _rotate_and_crop(self, image, angle):
+        # as image.rotate(angle).crop(self.bounds), but only resamples the pixels that are kept. PIL steps the
+        # transform incrementally from the first output pixel, so the occasional pixel on a rounding boundary
+        # can differ by a level or two
+        radians = -math.radians(angle)
+        cos, sin = round(math.cos(radians), 15), round(math.sin(radians), 15)
+        centre = self.half_width_height
+        left, top = self.bounds[0], self.bounds[1]
+
+        matrix = (
+            cos, sin, cos * -centre + sin * -centre + centre + cos * left + sin * top,
+            -sin, cos, -sin * -centre + cos * -centre + centre - sin * left + cos * top
+        )
+
+        return image.transform((self.size, self.size), Image.AFFINE, matrix, resample=Image.BILINEAR)
+
     def draw(self, image: Image, draw: ImageDraw):
         location = self.location()
         if location.lon is not None and location.lat is not None:
 
-            map = geotiler.Map(center=(location.lon, location.lat), zoom=self.zoom,
-                               size=(self.hypotenuse, self.hypotenuse))
-
-            if self.perceptible.moved(map, location):
-                self.cached = self._redraw(map)
+            if self.perceptible.moved(location):
+                if self.map is None:
+                    self.map = geotiler.Map(center=(location.lon, location.lat), zoom=self.zoom,
+                                            size=(self.hypotenuse, self.hypotenuse))
+                else:
+                    self.map.center = (location.lon, location.lat)
+                self.cached = self._redraw(self.map)
 
             image.alpha_composite(self.cached, self.at.tuple())
 
@@ -218,8 +312,7 @@ class MovingJourneyMap(Widget):
         self.cached_map = None
 
     def _redraw(self):
-        journey = Journey()
-        self.timeseries.process(journey.accept)
+        journey = journey_of(self.timeseries)
 
         bbox = journey.bounding_box
 
@@ -240,10 +333,7 @@ class MovingJourneyMap(Widget):
 
         log(f"... done")
 
-        plots = [
-            map.rev_geocode((location.lon, location.lat))
-            for location in journey.locations if not self.privacy_zone.encloses(location)
-        ]
+        plots = rev_geocode_all(map, self.privacy_zone.exclude(journey.locations))
 
         draw = ImageDraw.Draw(map_image)
         draw.line(plots, fill=(255, 0, 0), width=4)
@@ -303,8 +393,7 @@ class Circuit(Widget):
 
     def draw(self, image: Image, draw: ImageDraw):
         if self.image is None:
-            journey = Journey()
-            self.framemeta.process(journey.accept)
+            journey = journey_of(self.framemeta)
 
             self.bbox = journey.bounding_box
             self.size = self.bbox.size() * 1.1
@@ -312,7 +401,7 @@ class Circuit(Widget):
             self.image = Image.new("RGBA", self.dimensions.tuple(), (0, 0, 0, 0))
             draw = ImageDraw.Draw(self.image)
 
-            points = [self.scale(p) for p in journey.locations if not self.privacy_zone.encloses(p)]
+            points = [self.scale(p) for p in self.privacy_zone.exclude(journey.locations)]
 
             self.outline.draw(draw, rdp(points, 1))
 
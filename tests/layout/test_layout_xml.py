@@ -1,7 +1,11 @@
 import datetime
 
+import pytest
+
 from gopro_overlay.layout_components import metric_value
-from gopro_overlay.layout_xml import metric_accessor_from, date_formatter_from, Converters, quantity_formatter_for
+from gopro_overlay.layout_xml import metric_accessor_from, date_formatter_from, Converters, quantity_formatter_for, \
+    layout_from_xml
+from gopro_overlay.privacy import NoPrivacyZone
 from gopro_overlay.timeseries import Entry
 from gopro_overlay.units import units
 from tests.test_timeseries import datetime_of
@@ -58,3 +62,17 @@ def test_date_formatter():
     # Will just have to accept that calling with tz=None will do local tz, as its cached in datetime.py
     assert date_formatter_from(entry, "%Y/%m/%d %H:%M:%S.%f", tz=utc)() == "2022/02/11 19:12:22.000000"
     assert date_formatter_from(entry, "%Y/%m/%d %H:%M:%S.%f", tz=sort_of_pst)() == "2022/02/11 11:12:22.000000"
+
+
+def journey_map_with_max_points(max_points):
+    xml = f'<layout><component type="journey_map" max_points="{max_points}"/></layout>'
+    return layout_from_xml(xml, renderer=None, framemeta=None, font=None, privacy=NoPrivacyZone())(entry=None)
+
+
+def test_journey_map_max_points_needs_to_be_at_least_two():
+    with pytest.raises(IOError, match="at least 2"):
+        journey_map_with_max_points(1)
+
+
+def test_journey_map_max_points_has_no_upper_limit():
+    assert journey_map_with_max_points(200000)
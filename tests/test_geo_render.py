@@ -0,0 +1,96 @@
+import io
+
+import geotiler
+from PIL import Image
+from geotiler.map import Tile
+
+from gopro_overlay.geo_render import ImageTileCache, my_render_map
+
+
+def test_tile_cache_returns_none_for_unknown_url():
+    cache = ImageTileCache()
+    assert cache.get("http://a/1/2/3.png") is None
+
+
+def test_tile_cache_discards_least_recently_used():
+    cache = ImageTileCache(maxsize=2)
+
+    cache.put("a", "image-a")
+    cache.put("b", "image-b")
+    assert cache.get("a") == "image-a"
+
+    cache.put("c", "image-c")
+
+    assert cache.get("a") == "image-a"
+    assert cache.get("b") is None
+    assert cache.get("c") == "image-c"
+
+
+def test_tile_cache_passes_worker_limit_and_skips_download_when_all_cached():
+    requests = []
+
+    async def downloader(tiles, num_workers):
+        requests.append(([t.url for t in tiles], num_workers))
+        for t in tiles:
+            yield t._replace(img=png)
+
+    buffer = io.BytesIO()
+    Image.new("RGBA", (4, 4), (1, 2, 3, 255)).save(buffer, "PNG")
+    png = buffer.getvalue()
+
+    cache = ImageTileCache()
+    tiles = [Tile("a", (0, 0), None, None), Tile("b", (4, 0), None, None)]
+
+    first = cache.populate(downloader, tiles, error_image=None, num_workers=2)
+    assert sorted(t.url for t in first) == ["a", "b"]
+    assert requests == [(["a", "b"], 2)]
+
+    second = cache.populate(downloader, tiles, error_image=None, num_workers=2)
+    assert [t.img for t in second] == [cache.get("a"), cache.get("b")]
+    assert len(requests) == 1
+
+
+def test_render_map_downloads_with_provider_limit_unless_told_otherwise():
+    requests = []
+
+    async def downloader(tiles, num_workers):
+        requests.append(num_workers)
+        for t in tiles:
+            yield t._replace(img=png)
+
+    buffer = io.BytesIO()
+    Image.new("RGBA", (256, 256)).save(buffer, "PNG")
+    png = buffer.getvalue()
+
+    # different places, so the shared tile cache doesn't already have them
+    map = geotiler.Map(center=(-3.1, 55.9), zoom=14, size=(256, 256))
+    my_render_map(map, None, downloader)
+
+    map = geotiler.Map(center=(-2.2, 53.4), zoom=14, size=(256, 256))
+    my_render_map(map, None, downloader, num_workers=1)
+
+    assert requests == [map.provider.limit, 1]
+
+
+def test_tile_cache_counts_tiles_served_as_error_image():
+    async def downloader(tiles, num_workers):
+        for t in tiles:
+            yield t._replace(img=png if t.url == "good" else None)
+
+    buffer = io.BytesIO()
+    Image.new("RGBA", (4, 4)).save(buffer, "PNG")
+    png = buffer.getvalue()
+
+    error_image = Image.new("RGBA", (4, 4), (255, 0, 0, 255))
+    cache = ImageTileCache()
+    tiles = [Tile("good", (0, 0), None, None), Tile("bad", (4, 0), None, None)]
+
+    cache.populate(downloader, tiles, error_image)
+    assert cache.failures == 1
+
+    # served from the cache, but still the error image
+    cache.populate(downloader, tiles, error_image)
+    assert cache.failures == 2
+
+    cache.populate(downloader, tiles[:1], error_image)
+    assert cache.failures == 2
@@ -1,7 +1,11 @@
 from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.framemeta_gpmd import merge_frame_meta
 from gopro_overlay.gpmf import GPSFix
-from gopro_overlay.journey import Journey
+from gopro_overlay.journey import Journey, journey_of
 from gopro_overlay.point import Point, Coordinate, BoundingBox
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
 from tests.test_timeseries import datetime_of
 
 
@@ -45,3 +49,40 @@ def test_bounding_box_size():
     assert BoundingBox(Point(0,0), Point(1,1)).size() == Coordinate(x=1,y=1)
     assert BoundingBox(Point(-1,-1), Point(1,1)).size() == Coordinate(x=2,y=2)
 
+
+def test_journey_is_shared_until_framemeta_changes():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=0), Entry(dt=datetime_of(0), timestamp=units.Quantity(0, units.number),
+                                       gpsfix=GPSFix.LOCK_3D.value, point=Point(0, 0)))
+    fm.add(timeunits(seconds=1), Entry(dt=datetime_of(1), timestamp=units.Quantity(1000, units.number),
+                                       gpsfix=GPSFix.LOCK_3D.value, point=Point(1, 2)))
+
+    journey = journey_of(fm)
+    assert journey_of(fm) is journey
+    assert len(journey.locations) == 2
+
+    fm.process(lambda e: {"gpsfix": GPSFix.NO.value} if e.point == Point(1, 2) else None)
+
+    changed = journey_of(fm)
+    assert changed is not journey
+    assert len(changed.locations) == 1
+
+    merge_frame_meta(fm, fm, lambda e: {"gpsfix": GPSFix.LOCK_3D.value})
+
+    merged = journey_of(fm)
+    assert merged is not changed
+    assert len(merged.locations) == 2
+
+
+def test_journey_of_original_unaffected_by_changes_to_clone():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=0), Entry(dt=datetime_of(0), gpsfix=GPSFix.LOCK_3D.value, point=Point(0, 0)))
+    fm.add(timeunits(seconds=1), Entry(dt=datetime_of(1), gpsfix=GPSFix.LOCK_3D.value, point=Point(1, 2)))
+
+    journey = journey_of(fm)
+
+    fm.clone().process(lambda e: {"gpsfix": GPSFix.NO.value})
+
+    assert [e.gpsfix for e in fm.items()] == [GPSFix.LOCK_3D.value, GPSFix.LOCK_3D.value]
+    assert journey_of(fm) is journey
+    assert len(journey.locations) == 2
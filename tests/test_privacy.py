@@ -0,0 +1,19 @@
+from gopro_overlay.point import Point
+from gopro_overlay.privacy import PrivacyZone, NoPrivacyZone
+from gopro_overlay.units import units
+
+
+def test_privacy_zone_excludes_enclosed_points():
+    zone = PrivacyZone(Point(51.5, -0.1), units.Quantity(0.5, units.km))
+
+    near = Point(51.501, -0.1)
+    far = Point(51.51, -0.1)
+
+    assert zone.encloses(near)
+    assert not zone.encloses(far)
+    assert zone.exclude([near, far, near]) == [far]
+
+
+def test_no_privacy_zone_excludes_nothing():
+    points = [Point(51.5, -0.1), Point(51.51, -0.1)]
+    assert NoPrivacyZone().exclude(points) == points
@@ -0,0 +1,98 @@
+import random
+from datetime import timedelta
+
+import geotiler
+import pytest
+from PIL import Image, ImageChops, ImageDraw
+from geotiler.geo import WebMercator
+
+from gopro_overlay import fake
+from gopro_overlay.point import Point, Coordinate
+from gopro_overlay.widgets.map import JourneyMap, MovingMap, draw_marker, rev_geocode_all
+
+# Map drawing checks that don't need a font or map tiles
+
+ts = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=1), rng=random.Random(12345), point_step=0.0001)
+
+
+def plain_renderer(map):
+    return Image.new("RGBA", tuple(map.size), (200, 200, 200, 255))
+
+
+@pytest.mark.parametrize("size", [64, 256])
+@pytest.mark.parametrize("corner_radius", [None, 20])
+@pytest.mark.parametrize("pixel", [(19.39, 4.21), (5.5, 5.5), (0.4, 0.4), (3.7, 30.2), (30, 30), (-3, -3)])
+def test_journey_map_marker_matches_drawing_on_a_copy_of_the_map(size, corner_radius, pixel):
+    widget = JourneyMap(timeseries=ts, at=Coordinate(10, 20), location=None, renderer=plain_renderer, size=size,
+                        corner_radius=corner_radius)
+    widget._init_maybe()
+
+    lon, lat = widget.map.geocode(pixel)
+    widget.location = lambda: Point(lat, lon)
+
+    actual = Image.new("RGBA", (300, 300), (0, 0, 0, 255))
+    widget.draw(actual, ImageDraw.Draw(actual))
+
+    expected = Image.new("RGBA", (300, 300), (0, 0, 0, 255))
+    frame = widget.image.copy()
+    draw_marker(ImageDraw.Draw(frame), widget.map.rev_geocode((lon, lat)), 6)
+    expected.alpha_composite(frame, (10, 20))
+
+    assert actual.tobytes() == expected.tobytes()
+
+
+def moving_map_and_image(size):
+    widget = MovingMap(at=Coordinate(0, 0), location=None, azimuth=None, renderer=None, size=size)
+    noise = Image.frombytes("RGBA", (widget.hypotenuse, widget.hypotenuse),
+                            random.Random(size).randbytes(widget.hypotenuse * widget.hypotenuse * 4))
+    return widget, noise
+
+
+@pytest.mark.parametrize("size", [256, 101, 52, 64])
+def test_moving_map_crop_is_always_size(size):
+    widget, noise = moving_map_and_image(size)
+    assert noise.crop(widget.bounds).size == (size, size)
+
+
+@pytest.mark.parametrize("size", [256, 101, 52, 64])
+@pytest.mark.parametrize("angle", [1, 33, 45, 200.3, 359.9])
+def test_moving_map_rotate_and_crop_same_as_rotate_then_crop(size, angle):
+    widget, noise = moving_map_and_image(size)
+
+    expected = noise.rotate(angle, resample=Image.BILINEAR).crop(widget.bounds)
+    actual = widget._rotate_and_crop(noise, angle)
+
+    assert actual.size == (size, size)
+
+    # float rounding can nudge a pixel on a bilinear rounding boundary, but no more than that
+    difference = ImageChops.difference(actual, expected)
+    assert max(high for _, high in difference.getextrema()) <= 2
+    assert sum(1 for pixel in difference.getdata() if any(pixel)) <= 1
+
+
+@pytest.mark.parametrize("size", [256, 101, 52, 64])
+@pytest.mark.parametrize("angle", [90, 180, 270, -90, 450])
+def test_moving_map_transpose_and_crop_same_as_rotate_then_crop(size, angle):
+    widget, noise = moving_map_and_image(size)
+
+    expected = noise.rotate(angle, resample=Image.BILINEAR).crop(widget.bounds)
+    actual = widget._transpose_and_crop(noise, angle)
+
+    assert actual.size == (size, size)
+    assert actual.tobytes() == expected.tobytes()
+
+
+class Equirectangular(WebMercator):
+    def project(self, point):
+        return point
+
+
+@pytest.mark.parametrize("projection", [None, Equirectangular(0)])
+def test_rev_geocode_all_matches_geotiler(projection):
+    map = geotiler.Map(center=(-0.1, 51.5), zoom=15, size=(362, 362))
+    if projection is not None:
+        map.provider.projection = projection
+
+    locations = [Point(51.5, -0.1), Point(51.501, -0.102), Point(51.4987, -0.0965)]
+
+    assert rev_geocode_all(map, locations) == [map.rev_geocode((p.lon, p.lat)) for p in locations]
@@ -15,7 +15,7 @@ from gopro_overlay.privacy import NoPrivacyZone
 from gopro_overlay.timeunits import timeunits
 from gopro_overlay.timing import PoorTimer
 from gopro_overlay.units import units
-from gopro_overlay.widgets.map import MovingJourneyMap, view_window
+from gopro_overlay.widgets.map import MovingJourneyMap, view_window, decimate
 from gopro_overlay.widgets.widgets import Translate, Frame, SimpleFrameSupplier
 from tests.widgets import test_widgets_setup
 from tests.approval import approve_image
@@ -246,3 +246,16 @@ def test_view_window():
     assert window(128) == (0, 256)
     assert window(129) == (1, 257)
     assert window(1336 - 100) == (1336 - 256, 1336)
+
+
+def test_decimate():
+    points = list(range(10))
+
+    assert decimate(points, None) is points
+    assert decimate(points, 10) is points
+    assert decimate(points, 5) == [0, 3, 6, 9]
+    assert decimate(points, 4) == [0, 3, 6, 9]
+    assert decimate(points + [10], 5) == [0, 3, 6, 9, 10]
+
+    with pytest.raises(ValueError):
+        decimate(points, 1)